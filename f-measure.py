@@ -1,12 +1,42 @@
+import time
+import_started = time.perf_counter()
+
 import bpy
 import gpu
 from gpu_extras.batch import batch_for_shader
 from mathutils import Vector
 from bpy_extras import view3d_utils
+from bpy_extras.io_utils import ExportHelper
 import blf
 import mathutils
 import bmesh
 from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
+import os
+import sys
+import math
+import threading
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported when it is first used.
+
+    The first attribute access imports the module and rebinds the module-level name to it,
+    so loading the add-on does not pay for the import and later uses cost nothing extra.
+    """
+
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return getattr(module, attr)
+
+
+np = LazyModule("numpy", "np")
 
 line_colors = []  # This will store colors for each line
 # Store the line coordinates and lengths globally
@@ -14,7 +44,7 @@ lines = []  # This will hold pairs of (start, end) points for each line
 line_vertex_refs = []  # This will hold references to vertices (object, vertex index) for dynamic updates
 line_dynamic_flags = []  # This holds dynamic flags for each line's start and endpoint
 line_colors = []  # This will hold the colors for each line
-font_info = {"font_id": 0, "handler": None}
+font_info = {"font_id": 0}
 first_line_drawn = False  # Flag to indicate if at least one line has been drawn
 lines_visible = True  # Control whether lines are visible or hidden
 drawing_active = False  # Flag to track if the draw operator is active
@@ -23,21 +53,60 @@ hovered_edge = None  # Store the currently hovered edge
 vertex_highlight_threshold = 10  # Adjust this threshold as needed
 edge_highlight_threshold = 1
 length_draw_handler = None
+line_draw_handler = None
+addon_registered = False
+load_timings = {"import": None, "register": None}  # Seconds spent importing and registering the add-on
 
-# Shader and batch for drawing the lines
-shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-highlight_shader = gpu.shader.from_builtin('UNIFORM_COLOR')  # Shader for the hovered vertex
-
-bpy.types.Scene.font_size = bpy.props.FloatProperty(
-    name="Font Size",
-    description="Adjust the font size for line measurements",
-    default=20.0,
-    min=10.0,
-    max=50.0
-)
+# Shaders for drawing the lines and hovered vertex, created on first draw
+gpu_resources = {}
 
 # Cache to store BVH trees per object
 bvh_cache = {}
+# Cache to store object-space BVH trees, vertices, edges and group KD trees for clearance queries
+local_bvh_cache = {}
+clearance_measurements = []  # Line index and the two sources each clearance line is re-solved from
+
+# Projection state per viewport region, shared by the hover, highlight and label passes
+projection_cache = {}
+lines_generation = 0  # Bumped whenever line endpoints change so cached projections are refreshed
+lines_structure = 0  # Bumped when lines are added, finished or deleted so stale results are not applied
+
+# Dynamic line endpoints, lengths and labels are computed in a worker thread and published
+# through a double buffer: the worker fills the back slot and flips front_buffer, the draw
+# path only ever reads line_buffers[front_buffer] and never waits for the worker.
+line_buffers = [None, None]
+front_buffer = 0
+applied_result = None  # The published result last copied into `lines`
+update_executor = None  # Single worker thread, created on the first update
+update_lock = threading.Lock()
+worker_busy = False
+queued_snapshot = None  # Newest snapshot taken while the worker was busy; older ones are dropped
+
+# Map Blender's unit names to display-friendly names
+unit_map = {
+    'METERS': 'm',
+    'CENTIMETERS': 'cm',
+    'MILLIMETERS': 'mm',
+    'KILOMETERS': 'km',
+    'INCHES': 'in',
+    'FEET': 'ft',
+    'MILES': 'mi',
+    'NONE': ''  # If no units are set, use an empty string
+}
+
+# Baked measurement results: one row per frame, one float32 column per vertex-bound line
+baked_measurements = {"frames": None, "lengths": None, "line_indices": []}
+baking_active = False  # Suppress live line updates while frames are being baked
+BAKE_WORKER_FLAG = "--f-measure-bake-worker"
+
+def get_shader(name):
+    """Get a UNIFORM_COLOR shader by role, creating it on first use (never in background mode)."""
+    if bpy.app.background:
+        return None
+    if name not in gpu_resources:
+        gpu_resources[name] = gpu.shader.from_builtin('UNIFORM_COLOR')
+    return gpu_resources[name]
+
 
 def add_line_color(index):
     def update_color(self, context):
@@ -91,14 +160,147 @@ def get_bvh(obj):
     return bvh_cache[obj]["bvh"]
 
 
-def mark_bvh_dirty(obj):
-    """Mark BVH tree as dirty if the object is modified."""
+def mark_bvh_dirty(obj, geometry=True):
+    """Mark BVH tree as dirty if the object is modified.
+
+    The clearance cache is in object space, so a transform-only update keeps it.
+    """
     if obj in bvh_cache:
         bvh_cache[obj]["dirty"] = True
+    if geometry and obj in local_bvh_cache:
+        local_bvh_cache[obj]["dirty"] = True
+
+
+def build_local_bvh(obj):
+    """Build an object-space BVH tree plus vertex and edge arrays from the evaluated mesh."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    mesh.calc_loop_triangles()
+
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    eval_obj.to_mesh_clear()  # Clean up temporary mesh
+
+    if not len(co) or not len(tris):
+        return None
+
+    verts = co.reshape(-1, 3)
+    return {
+        "bvh": BVHTree.FromPolygons(verts.tolist(), tris.reshape(-1, 3).tolist()),
+        "verts": verts,
+        "edges": edges.reshape(-1, 2),
+        "kd": {},  # Vertex group name -> KDTree over the group's vertices
+        "edge_kd": None,  # KDTree over the edge midpoints, built by edge_midpoint_tree
+        "dirty": False,
+    }
+
+
+def get_local_bvh(obj):
+    """Get or build the object-space clearance entry for the given object."""
+    if obj.type != 'MESH':
+        return None
+    if obj not in local_bvh_cache or local_bvh_cache[obj]["dirty"]:
+        entry = build_local_bvh(obj)
+        if entry is None:
+            local_bvh_cache.pop(obj, None)
+            return None
+        local_bvh_cache[obj] = entry
+    return local_bvh_cache[obj]
+
+
+def mark_lines_changed(structure=False):
+    """Invalidate the projected line endpoints of every region.
+
+    Pass structure=True when lines are added, finished or removed, so results computed
+    for the previous set of lines are not applied to the new one.
+    """
+    global lines_generation, lines_structure
+    lines_generation += 1
+    if structure:
+        lines_structure += 1
+
+
+def project_points(projection, points):
+    """Project an (n, 3) array of world points to region pixels; points behind the view are NaN."""
+    matrix = projection["array"]
+    clip = points @ matrix[:, :3].T + matrix[:, 3]
+    w = clip[:, 3]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ndc = clip[:, :2] / w[:, None]
+    screen = (ndc + 1.0) * (np.array(projection["size"], dtype=np.float64) / 2.0)
+    screen[w <= 0.0] = np.nan
+    return screen
+
+
+def project_point(projection, co):
+    """Project a single world point to region pixels, or None if it is behind the view."""
+    clip = projection["matrix"] @ Vector((co[0], co[1], co[2], 1.0))
+    if clip.w <= 0.0:
+        return None
+    width, height = projection["size"]
+    return Vector(((clip.x / clip.w + 1.0) * width / 2.0, (clip.y / clip.w + 1.0) * height / 2.0))
 
 
-def update_hovered_geometry(context, event):
-    """Efficiently update hovered vertex or edge based on the mouse position."""
+def unproject_point(projection, screen_pos, depth_location):
+    """Map region pixels back to 3D on the view plane through depth_location."""
+    depth = projection["matrix"] @ Vector((depth_location[0], depth_location[1], depth_location[2], 1.0))
+    if depth.w == 0.0:
+        return None
+    width, height = projection["size"]
+    ndc = Vector((screen_pos[0] * 2.0 / width - 1.0, screen_pos[1] * 2.0 / height - 1.0, depth.z / depth.w, 1.0))
+    world = projection["inverse"] @ ndc
+    return world.xyz / world.w if world.w != 0.0 else None
+
+
+def prune_projection_cache():
+    """Drop cached projections of regions that no longer exist (closed areas, quad view toggled)."""
+    live = {
+        region.as_pointer()
+        for window in bpy.context.window_manager.windows
+        for area in window.screen.areas if area.type == 'VIEW_3D'
+        for region in area.regions if region.type == 'WINDOW'
+    }
+    for key in projection_cache.keys() - live:
+        del projection_cache[key]
+
+
+def get_region_projection(region, region_3d):
+    """Get the projection state of a region, rebuilt when its view matrix or the lines change."""
+    key = region.as_pointer()
+    size = (region.width, region.height)
+    matrix = region_3d.perspective_matrix
+    projection = projection_cache.get(key)
+
+    if projection is None or projection["size"] != size or projection["matrix"] != matrix:
+        projection = {
+            "matrix": matrix.copy(),
+            "inverse": matrix.inverted_safe(),
+            "array": np.array(matrix, dtype=np.float64),
+            "size": size,
+            "generation": None,
+        }
+        projection_cache[key] = projection
+
+    if projection["generation"] != lines_generation or len(projection["midpoints"]) != len(lines):
+        endpoints = np.array([[tuple(start), tuple(end)] for start, end in lines], dtype=np.float64).reshape(-1, 3)
+        projection["endpoints"] = project_points(projection, endpoints).reshape(-1, 2, 2)
+        projection["midpoints"] = project_points(projection, endpoints.reshape(-1, 2, 3).mean(axis=1))
+        projection["generation"] = lines_generation
+
+    return projection
+
+
+def update_hovered_geometry(context, region, region_3d, mouse_coord):
+    """Efficiently update hovered vertex or edge based on the mouse position.
+
+    region and region_3d are the viewport region under the mouse and its view, and
+    mouse_coord is the mouse position relative to that region.
+    """
     hovered_vertex = None
     hovered_vertex_ref = None
     hovered_edge = None
@@ -107,9 +309,7 @@ def update_hovered_geometry(context, event):
     best_vertex_dist = float('inf')
     best_edge_dist = float('inf')
 
-    region = context.region
-    region_3d = context.space_data.region_3d
-    mouse_coord = Vector((event.mouse_region_x, event.mouse_region_y))
+    projection = get_region_projection(region, region_3d)
 
     # Precompute ray origin and direction
     ray_origin = view3d_utils.region_2d_to_origin_3d(region, region_3d, mouse_coord)
@@ -129,16 +329,20 @@ def update_hovered_geometry(context, event):
         if raycast_result[0] is not None:  # If a hit is found
             location, normal, face_index, dist = raycast_result
 
-            # Check closest vertex
-            for vertex in obj.data.vertices:
-                world_pos = matrix_world @ vertex.co
-                screen_pos = view3d_utils.location_3d_to_region_2d(region, region_3d, world_pos)
-                if screen_pos:
-                    vertex_dist = (mouse_coord - screen_pos).length
-                    if vertex_dist < vertex_highlight_threshold and vertex_dist < best_vertex_dist:
-                        best_vertex_dist = vertex_dist
-                        hovered_vertex = world_pos
-                        hovered_vertex_ref = (obj, vertex.index)
+            # Check closest vertex, projecting all vertices at once with the region's cached matrix
+            co = np.empty(len(obj.data.vertices) * 3, dtype=np.float64)
+            obj.data.vertices.foreach_get("co", co)
+            matrix = np.array(matrix_world, dtype=np.float64)
+            screen = project_points(projection, co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3])
+            vertex_dists = np.hypot(screen[:, 0] - mouse_coord.x, screen[:, 1] - mouse_coord.y)
+            vertex_dists[np.isnan(vertex_dists)] = np.inf
+            if len(vertex_dists):
+                vertex_index = int(np.argmin(vertex_dists))
+                vertex_dist = vertex_dists[vertex_index]
+                if vertex_dist < vertex_highlight_threshold and vertex_dist < best_vertex_dist:
+                    best_vertex_dist = vertex_dist
+                    hovered_vertex = matrix_world @ obj.data.vertices[vertex_index].co
+                    hovered_vertex_ref = (obj, vertex_index)
 
             # Check closest edge using the face index from raycast
             if face_index is not None:
@@ -163,10 +367,7 @@ def update_hovered_geometry(context, event):
 
             
 # Function to convert 2D mouse coordinates into 3D space (using a depth reference point)
-def mouse_to_3d(context, event, depth_location):
-    region = context.region
-    region_3d = context.space_data.region_3d
-    mouse_coord = (event.mouse_region_x, event.mouse_region_y)
+def mouse_to_3d(region, region_3d, mouse_coord, depth_location):
     return view3d_utils.region_2d_to_location_3d(region, region_3d, mouse_coord, depth_location)
 
 # Function to calculate the length of a line segment
@@ -174,9 +375,6 @@ def calculate_length(start, end):
     return (end - start).length
 
 # Drawing the lines and hovered vertex in the viewport
-import math
-
-import time
 last_update_time = 0
 update_interval = 0.02  # Limit updates to every 20ms
 
@@ -189,11 +387,16 @@ def should_update_highlight():
     return False
 # Drawing the lines and hovered vertex in the viewport
 def draw():
+    sync_line_results()
+
+    # Prune before lookup so a region pointer reused by a new region never finds a stale entry
+    prune_projection_cache()
+
+    # Each region of a quad view calls this with its own region and view
+    projection = get_region_projection(bpy.context.region, bpy.context.region_data)
+
     def draw_square_around_point(screen_pos, reference_3d_point, color, square_size=8):
         """Draws a square around a 3D point projected to 2D."""
-        region = bpy.context.region
-        region_3d = bpy.context.space_data.region_3d
-
         # Create 2D points for the square
         square_2d_points = [
             (screen_pos[0] - square_size, screen_pos[1] - square_size),
@@ -204,12 +407,13 @@ def draw():
 
         # Convert 2D points back to 3D using the reference point for depth
         square_3d_points = [
-            view3d_utils.region_2d_to_location_3d(region, region_3d, point, reference_3d_point)
+            unproject_point(projection, point, reference_3d_point)
             for point in square_2d_points
         ]
 
         # Check if points are valid
         if None not in square_3d_points:
+            highlight_shader = get_shader("highlight")
             gpu.state.line_width_set(1.4)
             outline_batch = batch_for_shader(
                 highlight_shader, 'LINE_LOOP', {"pos": square_3d_points}
@@ -225,17 +429,13 @@ def draw():
 
     # Draw hovered vertex
     if hovered_vertex:
-        region = bpy.context.region
-        region_3d = bpy.context.space_data.region_3d
-        screen_pos = view3d_utils.location_3d_to_region_2d(region, region_3d, hovered_vertex)
+        screen_pos = project_point(projection, hovered_vertex)
         if screen_pos:
             draw_square_around_point(screen_pos, hovered_vertex, color=(1, 1, 1, 1))  # White
 
     # Draw hovered edge midpoint if no vertex is hovered
     if hovered_edge and not hovered_vertex:
-        region = bpy.context.region
-        region_3d = bpy.context.space_data.region_3d
-        screen_pos_edge = view3d_utils.location_3d_to_region_2d(region, region_3d, hovered_edge)
+        screen_pos_edge = project_point(projection, hovered_edge)
         if screen_pos_edge:
             draw_square_around_point(screen_pos_edge, hovered_edge, color=(0, 1, 0, 1))  # Green
 
@@ -254,6 +454,7 @@ def draw_dashed_line(start, end, dash_length=0.5, gap_length=None, thickness=3,
 
     # Use the color assigned to the line
     color = line_colors[index] if index is not None and index < len(line_colors) else (1.0, 1.0, 0.0, 1.0)
+    shader = get_shader("line")
     batch = batch_for_shader(shader, 'LINES', {"pos": [start, end]})
     shader.bind()
     shader.uniform_float("color", color)  # Dynamic color
@@ -275,88 +476,759 @@ def draw_callback_px(self, context):
     unit_settings = context.scene.unit_settings
     scale_length = unit_settings.scale_length
     unit_name = unit_settings.length_unit  # 'METERS', 'CENTIMETERS', etc.
-
-    # Map Blender's unit names to display-friendly names
-    unit_map = {
-        'METERS': 'm',
-        'CENTIMETERS': 'cm',
-        'MILLIMETERS': 'mm',
-        'KILOMETERS': 'km',
-        'INCHES': 'in',
-        'FEET': 'ft',
-        'MILES': 'mi',
-        'NONE': ''  # If no units are set, use an empty string
-    }
     unit_label = unit_map.get(unit_name, '')
 
     if lines_visible:  # Only draw lengths if they are visible
-        for line in lines:
-            start, end = line
-            length = calculate_length(start, end)  # Calculate length of the current line
+        # Reuse the worker's label strings while they match the current lines and format
+        result = sync_line_results()
+        labels = result["labels"] if result and result["format"] == (decimals, unit_label) else []
 
-            # Calculate the midpoint of the line
-            midpoint = (start + end) / 2
-
-            # Convert 3D midpoint to 2D screen space
-            region = context.region
-            region_3d = context.space_data.region_3d
-            mid_2d = view3d_utils.location_3d_to_region_2d(region, region_3d, midpoint)
+        # Midpoints are projected once per view change and shared with the other passes
+        projection = get_region_projection(context.region, context.region_data)
 
+        for i, (line, mid_2d) in enumerate(zip(lines, projection["midpoints"])):
             # Draw the length at the midpoint if the midpoint is visible
-            if mid_2d:
+            if not np.isnan(mid_2d[0]):
+                if i < len(labels):
+                    label = labels[i]
+                else:
+                    start, end = line
+                    length = calculate_length(start, end)  # Calculate length of the current line
+                    label = f"{length:.{decimals}f} {unit_label}"
+
                 blf.color(font_id, 1.0, 1.0, 1.0, 1.0)  # RGBA for white color
                 
                 # Set the font size and position for the length text
                 blf.position(font_id, mid_2d[0], mid_2d[1], 0)
                 blf.size(font_id, int(font_size))  # Use the custom font size
-                blf.draw(font_id, f"{length:.{decimals}f} {unit_label}")
+                blf.draw(font_id, label)
+
+
+def snapshot_lines(scene, depsgraph):
+    """Copy what the endpoint computation needs, on the main thread.
+
+    Only the vertices referenced by a dynamic endpoint are read from the evaluated meshes.
+    """
+    count = min(len(lines), len(line_dynamic_flags))  # A line still being drawn has no flags yet
+    static = np.array([[tuple(start), tuple(end)] for start, end in lines[:count]], dtype=np.float64)
+
+    # Object -> (vertex indices, endpoint slots) for the dynamic endpoints
+    targets = {}
+    for i, (refs, dynamic_flags) in enumerate(zip(line_vertex_refs[:count], line_dynamic_flags)):
+        for end in (0, 1):
+            ref = refs[end]
+            if dynamic_flags[end] and ref is not None and ref[0] is not None and ref[1] is not None:
+                indices, slots = targets.setdefault(ref[0], ([], []))
+                indices.append(ref[1])
+                slots.append(i * 2 + end)
+
+    objects = []
+    for obj, (indices, slots) in targets.items():
+        try:
+            if not obj.visible_get():
+                continue
+            eval_obj = obj.evaluated_get(depsgraph)
+        except ReferenceError:
+            continue  # The object was deleted
+        vertices = eval_obj.data.vertices  # Evaluated mesh, no to_mesh() copy
+        matrix = np.array(eval_obj.matrix_world, dtype=np.float64)
+
+        # Skip vertices that no longer exist after a topology change
+        indices = np.array(indices, dtype=np.int64)
+        slots = np.array(slots, dtype=np.int64)
+        valid = indices < len(vertices)
+        indices, slots = indices[valid], slots[valid]
+
+        # A few referenced vertices are read one by one; a bulk read only pays off when
+        # they are a sizeable share of the mesh
+        if len(indices) * 16 < len(vertices):
+            co = np.array([vertices[i].co for i in indices.tolist()], dtype=np.float64).reshape(-1, 3)
+        else:
+            co = np.empty(len(vertices) * 3, dtype=np.float64)
+            vertices.foreach_get("co", co)
+            co = co.reshape(-1, 3)[indices]
+        objects.append((co, matrix, slots))
+
+    unit_label = unit_map.get(scene.unit_settings.length_unit, '')
+    return {
+        "static": static.reshape(-1, 3),
+        "objects": objects,
+        "format": (scene.length_decimals, unit_label),
+        "structure": lines_structure,
+    }
+
+
+def compute_line_results(snapshot):
+    """Compute endpoints, lengths and label strings from a snapshot (runs in the worker)."""
+    endpoints = snapshot["static"].copy()
+    for local, matrix, slots in snapshot["objects"]:
+        endpoints[slots] = local @ matrix[:3, :3].T + matrix[:3, 3]
+
+    pairs = endpoints.reshape(-1, 2, 3)
+    lengths = np.linalg.norm(pairs[:, 1] - pairs[:, 0], axis=1)
+    decimals, unit_label = snapshot["format"]
+    return {
+        "endpoints": pairs,
+        "lengths": lengths,
+        "labels": [f"{length:.{decimals}f} {unit_label}" for length in lengths],
+        "format": snapshot["format"],
+        "structure": snapshot["structure"],
+    }
+
+
+def publish_line_results(result):
+    """Write a result to the back buffer and flip it to the front."""
+    global front_buffer
+    back = 1 - front_buffer
+    line_buffers[back] = result
+    front_buffer = back
+
+
+def line_update_worker(snapshot):
+    """Worker loop: compute and publish snapshots until no newer one is queued."""
+    global worker_busy, queued_snapshot
+    try:
+        while snapshot is not None:
+            publish_line_results(compute_line_results(snapshot))
+            with update_lock:
+                snapshot, queued_snapshot = queued_snapshot, None
+                if snapshot is None:
+                    worker_busy = False
+    except Exception:
+        # Nothing reads the executor's future, so report the error here
+        import traceback
+        traceback.print_exc()
+        with update_lock:
+            worker_busy = False
+            queued_snapshot = None
+
+
+def submit_line_update(snapshot):
+    """Hand a snapshot to the worker, replacing any snapshot still waiting for it."""
+    global update_executor, worker_busy, queued_snapshot
+    from concurrent.futures import ThreadPoolExecutor
+    with update_lock:
+        if worker_busy:
+            queued_snapshot = snapshot
+            return
+        worker_busy = True
+
+    if update_executor is None:
+        update_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="f-measure")
+    update_executor.submit(line_update_worker, snapshot)
+
+
+def sync_line_results():
+    """Copy the newest published endpoints into `lines`; called from the draw path, never waits.
+
+    Returns the front result if it matches the current lines, otherwise None.
+    """
+    global applied_result
+    result = line_buffers[front_buffer]
+    if result is None or result["structure"] != lines_structure:
+        return None
+
+    if result is not applied_result:
+        pairs = result["endpoints"]
+        for i, dynamic_flags in enumerate(line_dynamic_flags[:len(pairs)]):
+            if any(dynamic_flags):
+                lines[i] = (Vector(pairs[i, 0]), Vector(pairs[i, 1]))
+        applied_result = result
+        mark_lines_changed()
+    return result
+
+
+def redraw_when_published():
+    """Timer callback: redraw the 3D views once the worker has published its result."""
+    if worker_busy:
+        return 0.01
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return None
 
 
 # Handler function to update lines based on vertex movement
 def update_lines(scene, depsgraph):
-    global lines, line_vertex_refs, line_dynamic_flags
+    if not lines:
+        return
+
+    submit_line_update(snapshot_lines(scene, depsgraph))
+
+    # During playback the viewport redraws every frame and picks the result up by itself
+    screen = bpy.context.screen
+    if not (screen and screen.is_animation_playing):
+        if not bpy.app.timers.is_registered(redraw_when_published):
+            bpy.app.timers.register(redraw_when_published, first_interval=0.01)
 
-    # Cache evaluated objects and meshes
-    evaluated_objects = {}
-    meshes = {}
 
-    for obj in bpy.context.visible_objects:
-        if obj.type == 'MESH':
+def shutdown_line_updates():
+    """Stop the worker thread and drop any published results."""
+    global update_executor, applied_result, queued_snapshot
+    if update_executor is not None:
+        update_executor.shutdown(wait=True)
+        update_executor = None
+    if bpy.app.timers.is_registered(redraw_when_published):
+        bpy.app.timers.unregister(redraw_when_published)
+    line_buffers[:] = [None, None]
+    applied_result = None
+    queued_snapshot = None
+
+
+def build_bake_spec():
+    """Collect the vertex-bound lines into a serializable bake description."""
+    objects = {}  # Object name -> vertex indices and the endpoint slots they fill
+    static = []  # [slot, x, y, z] for endpoints that do not follow a vertex
+    line_indices = []
+
+    for i, (line, refs, dynamic_flags) in enumerate(zip(lines, line_vertex_refs, line_dynamic_flags)):
+        if not any(dynamic_flags):
+            continue
+        slot = len(line_indices)
+        line_indices.append(i)
+
+        for end in (0, 1):
+            ref = refs[end]
+            if dynamic_flags[end] and ref is not None and ref[0] is not None:
+                obj, vert_idx = ref
+                entry = objects.setdefault(obj.name, {"indices": [], "slots": []})
+                entry["indices"].append(vert_idx)
+                entry["slots"].append(slot * 2 + end)
+            else:
+                static.append([slot * 2 + end, *line[end]])
+
+    return {"objects": objects, "static": static, "line_indices": line_indices}
+
+
+def bake_frames(scene, spec, frames):
+    """Evaluate a bake spec on each frame and return a frames x measurements float32 array."""
+    count = len(spec["line_indices"])
+    result = np.empty((len(frames), count), dtype=np.float32)
+    endpoints = np.zeros((count * 2, 3), dtype=np.float32)
+
+    if spec["static"]:
+        static = np.array(spec["static"], dtype=np.float32)
+        endpoints[static[:, 0].astype(np.int64)] = static[:, 1:]
+
+    targets = []
+    for name, entry in spec["objects"].items():
+        obj = bpy.data.objects.get(name)
+        if obj is not None and obj.type == 'MESH':
+            targets.append((
+                obj,
+                np.array(entry["indices"], dtype=np.int64),
+                np.array(entry["slots"], dtype=np.int64),
+            ))
+
+    for row, frame in enumerate(frames):
+        scene.frame_set(int(frame))
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+        # One bulk read of the evaluated vertex positions per object and frame
+        for obj, indices, slots in targets:
             eval_obj = obj.evaluated_get(depsgraph)
             mesh = eval_obj.to_mesh()
-            evaluated_objects[obj] = eval_obj
-            meshes[obj] = mesh
+            co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", co)
+            matrix = np.array(eval_obj.matrix_world, dtype=np.float32)
+            eval_obj.to_mesh_clear()
+
+            # Skip vertices that no longer exist after a topology change
+            co = co.reshape(-1, 3)
+            valid = indices < len(co)
+            endpoints[slots[valid]] = co[indices[valid]] @ matrix[:3, :3].T + matrix[:3, 3]
+
+        pairs = endpoints.reshape(count, 2, 3)
+        result[row] = np.linalg.norm(pairs[:, 1] - pairs[:, 0], axis=1)
+
+    return result
+
+
+def bake_with_workers(scene, spec, frames, workers):
+    """Split the frame range across background Blender processes working on the saved file."""
+    import json
+    import subprocess
+    import tempfile
+    spec = dict(spec, scene=scene.name)
+    chunks = [chunk for chunk in np.array_split(frames, workers) if len(chunk)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        spec_path = os.path.join(tmp_dir, "spec.json")
+        with open(spec_path, "w") as spec_file:
+            json.dump(spec, spec_file)
+
+        processes = []
+        results = []
+        try:
+            for n, chunk in enumerate(chunks):
+                out_path = os.path.join(tmp_dir, f"chunk_{n}.npy")
+                command = [
+                    bpy.app.binary_path, "--background", "--factory-startup", bpy.data.filepath,
+                    "--python", os.path.abspath(__file__), "--",
+                    BAKE_WORKER_FLAG, spec_path, out_path, str(chunk[0]), str(chunk[-1]),
+                ]
+                processes.append((subprocess.Popen(command, stdout=subprocess.DEVNULL), out_path))
+
+            for process, out_path in processes:
+                if process.wait() != 0 or not os.path.exists(out_path):
+                    raise RuntimeError(f"Bake worker failed with exit code {process.returncode}")
+                results.append(np.load(out_path))
+        finally:
+            # Stop the remaining workers before their temporary files are removed
+            for process, out_path in processes:
+                if process.poll() is None:
+                    process.terminate()
+                    process.wait()
+
+    return np.concatenate(results, axis=0)
+
+
+def run_bake_worker(args):
+    """Entry point of a background bake worker: bake one slice of frames to a .npy file."""
+    import json
+    spec_path, out_path, first, last = args[:4]
+    with open(spec_path) as spec_file:
+        spec = json.load(spec_file)
+    scene = bpy.data.scenes.get(spec["scene"], bpy.context.scene)
+    np.save(out_path, bake_frames(scene, spec, range(int(first), int(last) + 1)))
+
+
+def bake_measurements(scene, frame_start, frame_end, workers=0):
+    """Bake every vertex-bound line over an inclusive frame range into baked_measurements.
+
+    Returns baked_measurements, or None when there are no vertex-bound lines.
+    """
+    global baking_active
+    spec = build_bake_spec()
+    if not spec["line_indices"]:
+        return None  # Nothing to bake; leave the current frame and previous results alone
+
+    frames = np.arange(frame_start, frame_end + 1, dtype=np.int32)
+
+    # Worker processes load the saved .blend, so they need a file on disk
+    if workers > 1 and bpy.data.filepath and len(frames) > workers:
+        lengths = bake_with_workers(scene, spec, frames, workers)
+    else:
+        original_frame = scene.frame_current
+        baking_active = True
+        try:
+            lengths = bake_frames(scene, spec, frames)
+        finally:
+            baking_active = False
+            scene.frame_set(original_frame)
+
+    baked_measurements.update(frames=frames, lengths=lengths, line_indices=spec["line_indices"])
+    return baked_measurements
+
+
+def write_baked_fcurves(scene):
+    """Write the baked lengths to F-curves on scene properties so they can drive other data."""
+    frames = baked_measurements["frames"]
+    lengths = baked_measurements["lengths"]
+    if frames is None or not len(frames):
+        return
+
+    anim_data = scene.animation_data or scene.animation_data_create()
+    if anim_data.action is None:
+        anim_data.action = bpy.data.actions.new(name="MeasurementBake")
+    action = anim_data.action
+
+    co = np.empty((len(frames), 2), dtype=np.float32)
+    co[:, 0] = frames
+    for column, line_index in enumerate(baked_measurements["line_indices"]):
+        prop_name = f"measurement_length_{line_index + 1}"
+        data_path = f'["{prop_name}"]'
+        scene[prop_name] = float(lengths[0, column])
+
+        # Replace any previous bake of this line
+        fcurve = action.fcurves.find(data_path)
+        if fcurve is not None:
+            action.fcurves.remove(fcurve)
+        fcurve = action.fcurves.new(data_path)
+
+        co[:, 1] = lengths[:, column]
+        fcurve.keyframe_points.add(len(frames))
+        fcurve.keyframe_points.foreach_set("co", co.ravel())
+        fcurve.update()
+
+
+def export_baked_measurements(filepath):
+    """Export the baked lengths as CSV with one row per frame."""
+    frames = baked_measurements["frames"]
+    lengths = baked_measurements["lengths"]
+    header = ",".join(["frame"] + [f"line_{i + 1}" for i in baked_measurements["line_indices"]])
+    np.savetxt(
+        filepath, np.column_stack((frames, lengths)), delimiter=",", header=header, comments="",
+        fmt=["%d"] + ["%.6f"] * lengths.shape[1]
+    )
 
-    # Update line positions
-    for i, (line, refs, dynamic_flags) in enumerate(zip(lines, line_vertex_refs, line_dynamic_flags)):
-        updated_start = line[0]
-        updated_end = line[1]
-        print(f"Line {i}: Start ref: {refs[0]}, End ref: {refs[1]}, Dynamic flags: {dynamic_flags}")
 
-        # Update start position if dynamic
-        if refs[0] is not None and dynamic_flags[0]:
-            obj, vert_idx = refs[0]
-            if obj in meshes and vert_idx is not None:
-                updated_start = evaluated_objects[obj].matrix_world @ meshes[obj].vertices[vert_idx].co
+def vertex_group_indices(obj, group_name):
+    """Return the indices of the vertices assigned to a vertex group, or None for the whole mesh."""
+    if not group_name:
+        return None
+    group = obj.vertex_groups.get(group_name)
+    if group is None:
+        raise KeyError(f"'{obj.name}' has no vertex group '{group_name}'")
+    return np.array(
+        [v.index for v in obj.data.vertices if any(g.group == group.index for g in v.groups)],
+        dtype=np.int64
+    )
+
 
-        # Update end position if dynamic
-        if refs[1] is not None and dynamic_flags[1]:
-            obj, vert_idx = refs[1]
-            if obj in meshes and vert_idx is not None:
-                updated_end = evaluated_objects[obj].matrix_world @ meshes[obj].vertices[vert_idx].co
+def aabb_distance(points, box_min, box_max):
+    """Distance from each point to an axis-aligned bounding box (0 inside the box)."""
+    return np.linalg.norm(np.maximum(np.maximum(box_min - points, points - box_max), 0.0), axis=1)
+
+
+def segment_distances(p1, q1, p2, q2):
+    """Closest points between the segments p1-q1 and p2-q2, row by row.
+
+    Vectorized form of the usual clamped line-line solution: solve for the closest points
+    of the infinite lines, clamp one parameter to its segment and recompute the other.
+    Returns (distances, points on the first segments, points on the second segments).
+    """
+    eps = 1e-12
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = np.einsum('ij,ij->i', d1, d1)
+    e = np.einsum('ij,ij->i', d2, d2)
+    b = np.einsum('ij,ij->i', d1, d2)
+    c = np.einsum('ij,ij->i', d1, r)
+    f = np.einsum('ij,ij->i', d2, r)
+
+    safe_a = np.where(a > eps, a, 1.0)
+    safe_e = np.where(e > eps, e, 1.0)
+    denom = a * e - b * b
+    safe_denom = np.where(denom > eps, denom, 1.0)
+
+    # Parallel or degenerate segments start from s = 0
+    s = np.where(denom > eps, np.clip((b * f - c * e) / safe_denom, 0.0, 1.0), 0.0)
+    t = (b * s + f) / safe_e
+
+    # Clamp t to the second segment and recompute s for it
+    s = np.where(t < 0.0, np.clip(-c / safe_a, 0.0, 1.0), s)
+    s = np.where(t > 1.0, np.clip((b - c) / safe_a, 0.0, 1.0), s)
+    t = np.clip(t, 0.0, 1.0)
+
+    # Degenerate segments are points: project the other segment's parameter onto them
+    first_is_point = a <= eps
+    second_is_point = e <= eps
+    s = np.where(second_is_point, np.clip(-c / safe_a, 0.0, 1.0), s)
+    t = np.where(second_is_point, 0.0, t)
+    s = np.where(first_is_point, 0.0, s)
+    t = np.where(first_is_point & ~second_is_point, np.clip(f / safe_e, 0.0, 1.0), t)
+
+    closest_1 = p1 + d1 * s[:, None]
+    closest_2 = p2 + d2 * t[:, None]
+    return np.linalg.norm(closest_1 - closest_2, axis=1), closest_1, closest_2
+
+
+def clearance_side(source, depsgraph):
+    """Gather one side of a clearance: the cached object-space data plus the current transform.
+
+    Only the transform and the world positions of the query vertices are recomputed per
+    solve; trees are rebuilt by get_local_bvh when the geometry itself changed.
+    """
+    obj = source["obj"]
+    entry = get_local_bvh(obj)
+    if entry is None:
+        return None
+
+    indices = source["indices"]
+    if indices is not None:
+        if not len(indices) or indices.max() >= len(entry["verts"]):
+            return None  # Empty group, or topology changed since the vertex group was read
+        kd_tree = entry["kd"].get(source["group"])
+        if kd_tree is None:
+            kd_tree = KDTree(len(indices))
+            for i, co in enumerate(entry["verts"][indices]):
+                kd_tree.insert(co, i)
+            kd_tree.balance()
+            entry["kd"][source["group"]] = kd_tree
+    else:
+        kd_tree = None
+
+    matrix = np.array(obj.evaluated_get(depsgraph).matrix_world, dtype=np.float64)
+    local = entry["verts"] if indices is None else entry["verts"][indices]
+    world = local @ matrix[:3, :3].T + matrix[:3, 3]
+    return {
+        "entry": entry,
+        "kd": kd_tree,
+        "matrix": matrix,
+        "inverse": np.linalg.inv(matrix),
+        # Smallest scale factor, to turn world distances into safe object-space search radii
+        "scale": max(float(np.linalg.svd(matrix[:3, :3], compute_uv=False).min()), 1e-12),
+        "world": world,
+        "min": world.min(axis=0),
+        "max": world.max(axis=0),
+    }
+
+
+def nearest_on_side(side, co, max_dist):
+    """Nearest point of a side to a world-space point, as (world location, world distance).
 
-        # Apply updates
-        lines[i] = (updated_start, updated_end)
+    The query runs in the side's object space. Under non-uniform scale the object-space
+    nearest point can differ slightly from the world-space one.
+    """
+    inverse = side["inverse"]
+    local = Vector(inverse[:3, :3] @ co + inverse[:3, 3])
+    if side["kd"] is None:
+        location = side["entry"]["bvh"].find_nearest(local, max_dist / side["scale"])[0]
+    else:
+        location = side["kd"].find(local)[0]
+    if location is None:
+        return None, float('inf')
+
+    matrix = side["matrix"]
+    world = matrix[:3, :3] @ np.array(location) + matrix[:3, 3]
+    return world, float(np.linalg.norm(world - co))
+
+
+def side_edges(side, box_min, box_max, margin):
+    """World-space endpoints of the edges of a whole-mesh side near a bounding box."""
+    edges = side["entry"]["edges"]
+    starts = side["world"][edges[:, 0]]
+    ends = side["world"][edges[:, 1]]
+    edge_min = np.minimum(starts, ends) - margin
+    edge_max = np.maximum(starts, ends) + margin
+    near = np.all(edge_min <= box_max, axis=1) & np.all(edge_max >= box_min, axis=1)
+    return starts[near], ends[near], edge_min[near], edge_max[near]
+
+
+def find_intersection(side_a, side_b):
+    """Return a world point where an edge of one side crosses the other side's surface, or None.
+
+    An edge can only cross the surface if the surface comes within half the edge's length
+    of its midpoint, so only edges passing that nearest-point lookup are ray cast.
+    """
+    for side, other in ((side_a, side_b), (side_b, side_a)):
+        starts, ends, _, _ = side_edges(side, other["min"], other["max"], 0.0)
+        inverse = other["inverse"]
+        local_starts = starts @ inverse[:3, :3].T + inverse[:3, 3]
+        local_dirs = (ends - starts) @ inverse[:3, :3].T
+        lengths = np.linalg.norm(local_dirs, axis=1)
+        local_mids = local_starts + local_dirs / 2.0
+        bvh_tree = other["entry"]["bvh"]
+        for origin, direction, mid, length in zip(
+            local_starts.tolist(), local_dirs.tolist(), local_mids.tolist(), lengths.tolist()
+        ):
+            if length == 0.0 or bvh_tree.find_nearest(mid, length / 2.0)[0] is None:
+                continue
+            location = bvh_tree.ray_cast(Vector(origin), Vector(direction), length)[0]
+            if location is not None:
+                matrix = other["matrix"]
+                return matrix[:3, :3] @ np.array(location) + matrix[:3, 3]
+    return None
+
+
+def edge_midpoint_tree(entry):
+    """Get the KD tree over an entry's object-space edge midpoints, building it on first use.
+
+    Edges longer than four times the median stay out of the tree, so a few long edges do
+    not widen every query; they are returned separately and checked by bounding box.
+    """
+    if entry["edge_kd"] is None:
+        verts, edges = entry["verts"], entry["edges"]
+        starts, ends = verts[edges[:, 0]], verts[edges[:, 1]]
+        mids = (starts + ends) / 2.0
+        halves = np.linalg.norm(ends - starts, axis=1) / 2.0
+        short = halves <= 4.0 * float(np.median(halves)) if len(halves) else halves > 0.0
+
+        kd_tree = KDTree(int(short.sum()))
+        for i in np.nonzero(short)[0].tolist():
+            kd_tree.insert(mids[i], i)
+        kd_tree.balance()
+        entry["edge_kd"] = {
+            "kd": kd_tree,
+            "mids": mids,
+            "halves": halves,
+            "limit": float(halves[short].max()) if short.any() else 0.0,  # Longest edge in the tree
+            "long": np.nonzero(~short)[0],
+        }
+    return entry["edge_kd"]
+
+
+def nearest_edge_pair(side_a, side_b, best_dist):
+    """Closest edge-to-edge pair closer than best_dist, as (distance, point_a, point_b) or None.
+
+    The edges of the side with fewer edges near the other side's box are looked up in the
+    other side's edge midpoint tree. An edge can only beat best_dist if the other surface
+    comes within best_dist plus its half length of its midpoint, and two edges only if
+    their midpoints are closer than best_dist plus both half lengths, so only those pairs
+    are measured.
+    """
+    near_a = side_edges(side_a, side_b["min"], side_b["max"], best_dist)
+    near_b = side_edges(side_b, side_a["min"], side_a["max"], best_dist)
+    if not len(near_a[0]) or not len(near_b[0]):
+        return None
+
+    # Query from the side with fewer candidate edges
+    flipped = len(near_b[0]) < len(near_a[0])
+    target = side_a if flipped else side_b
+    starts, ends, query_min, query_max = near_b if flipped else near_a
+
+    # Midpoints and radii in the target's object space; dividing by the smallest scale
+    # factor keeps the radii large enough under any transform
+    tree = edge_midpoint_tree(target["entry"])
+    inverse = target["inverse"]
+    mids = (starts + ends) / 2.0 @ inverse[:3, :3].T + inverse[:3, 3]
+    halves = np.linalg.norm(ends - starts, axis=1) / 2.0 / target["scale"]
+    reach = best_dist / target["scale"] + halves
+
+    counts, columns = [], []
+    find_nearest = target["entry"]["bvh"].find_nearest
+    find_range = tree["kd"].find_range
+    for co, radius in zip(mids.tolist(), reach.tolist()):
+        if find_nearest(co, radius)[0] is None:
+            counts.append(0)  # The whole target surface is out of reach of this edge
+            continue
+        hits = find_range(co, radius + tree["limit"])
+        counts.append(len(hits))
+        columns.extend([hit[1] for hit in hits])
+    rows = np.repeat(np.arange(len(counts)), counts)
+    columns = np.array(columns, dtype=np.int64)
+
+    # Keep the pairs whose own midpoint distance allows them to beat best_dist
+    close = np.linalg.norm(mids[rows] - tree["mids"][columns], axis=1) < reach[rows] + tree["halves"][columns]
+    rows, columns = rows[close], columns[close]
+
+    # Long target edges are paired by bounding box instead; the query boxes from
+    # side_edges are already expanded by best_dist
+    edges = target["entry"]["edges"]
+    if len(tree["long"]):
+        long_starts = target["world"][edges[tree["long"], 0]]
+        long_ends = target["world"][edges[tree["long"], 1]]
+        long_min = np.minimum(long_starts, long_ends)
+        long_max = np.maximum(long_starts, long_ends)
+        chunk = max(1, 2000000 // len(tree["long"]))  # Bound the size of the pairwise box test
+        for first in range(0, len(starts), chunk):
+            block = slice(first, first + chunk)
+            i, j = np.nonzero(np.all(
+                (query_min[block, None, :] <= long_max[None, :, :])
+                & (query_max[block, None, :] >= long_min[None, :, :]), axis=2
+            ))
+            rows = np.concatenate((rows, i + first))
+            columns = np.concatenate((columns, tree["long"][j]))
+    if not len(rows):
+        return None
+
+    target_starts = target["world"][edges[columns, 0]]
+    target_ends = target["world"][edges[columns, 1]]
+    dists, query_points, target_points = segment_distances(starts[rows], ends[rows], target_starts, target_ends)
+    k = int(np.argmin(dists))
+    if dists[k] >= best_dist:
+        return None
+    if flipped:
+        return float(dists[k]), target_points[k], query_points[k]
+    return float(dists[k]), query_points[k], target_points[k]
+
+
+def solve_clearance(source_a, source_b, hint=None):
+    """Find the minimum distance and closest point pair between two clearance sources.
+
+    Returns (distance, point_a, point_b, hint) or None. Vertices of each side are queried
+    against the other side, then whole meshes get an edge-to-edge pass, which together
+    cover every closest pair of two triangle meshes. The hint records the vertex that
+    produced the last result and is queried first on the next solve, so the bounding-box
+    pruning starts from a tight bound when the objects only moved a little.
+    """
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    sides = [clearance_side(source, depsgraph) for source in (source_a, source_b)]
+    if None in sides:
+        return None
+    whole_meshes = source_a["indices"] is None and source_b["indices"] is None
+
+    # Intersecting surfaces have zero clearance
+    if whole_meshes and np.all(sides[0]["min"] <= sides[1]["max"]) and np.all(sides[1]["min"] <= sides[0]["max"]):
+        point = find_intersection(*sides)
+        if point is not None:
+            return 0.0, Vector(point), Vector(point), None
+
+    best_dist = float('inf')
+    best_pair = None
+    best_hint = None
+
+    # Query the vertices of each side against the other side, nearest bounding-box distance first
+    passes = [(0, 0, sides[0]["world"], sides[1]), (1, 0, sides[1]["world"], sides[0])]
+    if hint is not None and hint[1] < len(sides[hint[0]]["world"]):
+        side, idx = hint
+        passes.insert(0, (side, idx, sides[side]["world"][idx:idx + 1], sides[1 - side]))
+
+    for side, offset, pts, other in passes:
+        bounds = aabb_distance(pts, other["min"], other["max"])
+        for idx in np.argsort(bounds):
+            if bounds[idx] >= best_dist:
+                break  # Every remaining vertex is farther from the box than the best pair
+            location, dist = nearest_on_side(other, pts[idx], best_dist)
+            if location is not None and dist < best_dist:
+                best_dist = dist
+                best_pair = (pts[idx], location) if side == 0 else (location, pts[idx])
+                best_hint = (side, int(idx) + offset)
+
+    # Crossing edges can be closer than any vertex is to the other surface
+    if whole_meshes and best_pair is not None:
+        edge_pair = nearest_edge_pair(sides[0], sides[1], best_dist)
+        if edge_pair is not None:
+            best_dist, point_a, point_b = edge_pair
+            best_pair = (point_a, point_b)
+
+    if best_pair is None:
+        return None
+    return best_dist, Vector(best_pair[0]), Vector(best_pair[1]), best_hint
+
+
+def add_clearance_line(source_a, source_b):
+    """Solve a clearance between two sources and add it as a line that follows them."""
+    result = solve_clearance(source_a, source_b)
+    if result is None:
+        return None
+    dist, point_a, point_b, hint = result
 
-    # Clear temporary meshes
-    for obj, mesh in meshes.items():
-        evaluated_objects[obj].to_mesh_clear()
+    lines.append([point_a.copy(), point_b.copy()])
+    line_vertex_refs.append([None, None])
+    line_dynamic_flags.append([False, False])
+    add_line_color(len(lines) - 1)
+    clearance_measurements.append({"line": len(lines) - 1, "a": source_a, "b": source_b, "hint": hint})
+    mark_lines_changed(structure=True)
+    return dist
 
-    # Redraw viewport
-    for area in bpy.context.screen.areas:
-        if area.type == 'VIEW_3D':
-            area.tag_redraw()
 
+def update_clearances(depsgraph=None):
+    """Re-solve the clearance lines whose objects were updated in this depsgraph evaluation.
+
+    Without a depsgraph every clearance line is re-solved. Records whose objects were
+    removed, for example by undo, are dropped.
+    """
+    if not clearance_measurements:
+        return
+
+    if depsgraph is not None:
+        updated = {
+            update.id.original for update in depsgraph.updates if isinstance(update.id, bpy.types.Object)
+        }
+
+    stale = set()
+    for record in clearance_measurements:
+        try:
+            if depsgraph is None or record["a"]["obj"] in updated or record["b"]["obj"] in updated:
+                resolve_clearance(record)
+        except ReferenceError:
+            stale.add(id(record))
+
+    if stale:
+        clearance_measurements[:] = [r for r in clearance_measurements if id(r) not in stale]
+
+
+def resolve_clearance(record):
+    """Re-solve one clearance line in place, starting from its previous closest vertex."""
+    result = solve_clearance(record["a"], record["b"], record["hint"])
+    if result is not None:
+        dist, point_a, point_b, record["hint"] = result
+        lines[record["line"]] = [point_a, point_b]
+        mark_lines_changed()
 
 
 def init():
@@ -364,12 +1236,40 @@ def init():
     global font_info
     font_info["font_id"] = 0  # Use default Blender font
 
+
+def ensure_draw_handlers():
+    """Add the persistent line and length draw handlers on first tool use."""
+    global line_draw_handler, length_draw_handler
+    if bpy.app.background:
+        return
+
+    init()  # Initialize font
+    if line_draw_handler is None:
+        line_draw_handler = bpy.types.SpaceView3D.draw_handler_add(draw, (), 'WINDOW', 'POST_VIEW')
+    if length_draw_handler is None:
+        length_draw_handler = bpy.types.SpaceView3D.draw_handler_add(
+            draw_callback_px, (None, bpy.context), 'WINDOW', 'POST_PIXEL'
+        )
+
+
+def remove_draw_handlers():
+    """Remove every draw handler so a reload does not leave stale callbacks behind."""
+    global line_draw_handler, length_draw_handler
+    for handler in (line_draw_handler, length_draw_handler):
+        if handler is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(handler, 'WINDOW')
+    line_draw_handler = length_draw_handler = None
+
 # Modal operator to handle mouse input and draw lines
 class ModalDrawOperator(bpy.types.Operator):
     """Draw a yellow line with the mouse"""
     bl_idname = "view3d.modal_draw"
     bl_label = "Draw measurement Line"
-    
+
+    @classmethod
+    def poll(cls, context):
+        return not bpy.app.background
+
     def __init__(self):
         self.start_pos = None
         self.start_vertex_ref = None  # Initialize start_vertex_ref to None
@@ -423,12 +1323,29 @@ class ModalDrawOperator(bpy.types.Operator):
                     if event.type in {'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
                         return {'PASS_THROUGH'}
 
+                    # The tool is started from the sidebar, so context.region is not the viewport;
+                    # use the viewport region under the mouse (one of four in quad view) and its view
+                    view_region = next(
+                        (
+                            region for region in area.regions
+                            if region.type == 'WINDOW'
+                            and region.x <= mouse_x < region.x + region.width
+                            and region.y <= mouse_y < region.y + region.height
+                        ),
+                        None
+                    )
+                    if view_region is None:
+                        return {'PASS_THROUGH'}  # Header or toolbar
+                    region_3d = view_region.data
+                    mouse_coord = Vector((mouse_x - view_region.x, mouse_y - view_region.y))
 
                 
 
                     if event.type == 'MOUSEMOVE' and should_update_highlight():
                         # Update hovered geometry and get results
-                        hovered_vertex, hovered_vertex_ref, hovered_edge, hovered_edge_ref = update_hovered_geometry(context, event)
+                        hovered_vertex, hovered_vertex_ref, hovered_edge, hovered_edge_ref = update_hovered_geometry(
+                            context, view_region, region_3d, mouse_coord
+                        )
 
                         # Update references in the class
                         self.hovered_vertex_ref = hovered_vertex_ref
@@ -442,7 +1359,7 @@ class ModalDrawOperator(bpy.types.Operator):
 
                         # Update snapping logic based on hovered geometry
                         if self.start_pos is not None:
-                            current_pos = mouse_to_3d(context, event, self.start_pos)
+                            current_pos = mouse_to_3d(view_region, region_3d, mouse_coord, self.start_pos)
 
                             if hovered_vertex:
                                 for axis, locked in self.axis_lock.items():
@@ -469,6 +1386,7 @@ class ModalDrawOperator(bpy.types.Operator):
                             # Update the current line
                             if lines:
                                 lines[-1][1] = current_pos
+                                mark_lines_changed()
                                 self.current_pos = current_pos
                                 context.area.tag_redraw()
 
@@ -485,17 +1403,21 @@ class ModalDrawOperator(bpy.types.Operator):
                                 )
                             else:
                                 self.start_pos, self.start_hovered_vertex, self.start_vertex_ref = (
-                                    mouse_to_3d(context, event, Vector((0, 0, 0))), None, None
+                                    mouse_to_3d(view_region, region_3d, mouse_coord, Vector((0, 0, 0))), None, None
                                 )
 
                             # Start a new line
                             lines.append([self.start_pos.copy(), self.start_pos.copy()])
                             line_vertex_refs.append([self.start_vertex_ref, None])
                             add_line_color(len(lines) - 1)
+                            mark_lines_changed(structure=True)
 
                         elif event.value == 'RELEASE':
-                            final_position = self.current_pos or mouse_to_3d(context, event, self.start_pos)
+                            final_position = self.current_pos or mouse_to_3d(
+                                view_region, region_3d, mouse_coord, self.start_pos
+                            )
                             lines[-1][1] = final_position
+                            mark_lines_changed()
 
                             # Clear hovered vertex
                             current_hovered_vertex, hovered_vertex = hovered_vertex, None
@@ -516,6 +1438,7 @@ class ModalDrawOperator(bpy.types.Operator):
                             )
 
                             line_dynamic_flags.append([start_dynamic, end_dynamic])
+                            mark_lines_changed(structure=True)
 
                             # Reset for the next line
                             self.start_pos, self.start_vertex_ref, self.current_pos = None, None, None
@@ -551,23 +1474,15 @@ class ModalDrawOperator(bpy.types.Operator):
 
 
     def invoke(self, context, event):
-        global drawing_active, length_draw_handler
+        global drawing_active
 
         if drawing_active:
             # If already active, stop the drawing mode
             self.cancel(context)
             return {'CANCELLED'}
         else:
-            init()  # Initialize font
-            self._handle = bpy.types.SpaceView3D.draw_handler_add(draw, (), 'WINDOW', 'POST_VIEW')
-            font_info["handler"] = bpy.types.SpaceView3D.draw_handler_add(
-                draw_callback_px, (self, context), 'WINDOW', 'POST_PIXEL')
-            
-            # Ensure length draw handler is added only once
-            if length_draw_handler is None:
-                length_draw_handler = bpy.types.SpaceView3D.draw_handler_add(
-                    draw_callback_px, (self, context), 'WINDOW', 'POST_PIXEL'
-                )
+            # Line and length handlers are added once and kept after the tool stops
+            ensure_draw_handlers()
 
             # Force update depsgraph to get the latest mesh info
             depsgraph = context.evaluated_depsgraph_get()
@@ -589,12 +1504,7 @@ class ModalDrawOperator(bpy.types.Operator):
         hovered_vertex = None  # Clear hovered vertex on cancel
         hovered_edge = None  # Clear hovered edge on cancel
 
-        # Only remove the font_info handler for text or highlights
-        if font_info["handler"]:
-            bpy.types.SpaceView3D.draw_handler_remove(font_info["handler"], 'WINDOW')
-            font_info["handler"] = None
-
-        # Do not remove `self._handle` to preserve line rendering
+        # Do not remove the draw handlers to preserve line and length rendering
         # This ensures lines persist in the viewport
 
         # Ensure the viewport redraws
@@ -607,14 +1517,6 @@ class ModalDrawOperator(bpy.types.Operator):
 
 
 
-def get_font_size():
-    return bpy.context.scene.get("font_size", 20)
-
-def set_font_size(value):
-    bpy.context.scene["font_size"] = value
-
-bpy.types.Scene.font_size = property(get_font_size, set_font_size)
-
 # Update the panel class to include the font size control
 # Update the panel class to include a color picker for each line
 class VIEW3D_PT_draw_line_panel(bpy.types.Panel):
@@ -639,6 +1541,13 @@ class VIEW3D_PT_draw_line_panel(bpy.types.Panel):
         
         # Decimal places control
         layout.prop(context.scene, "length_decimals", text="Decimal Places")
+
+        layout.operator("view3d.measure_clearance", text="Measure Clearance")
+
+        # Bake lengths over the scene frame range
+        row = layout.row(align=True)
+        row.operator("view3d.bake_measurements", text="Bake Measurements")
+        row.operator("view3d.export_baked_measurements", text="", icon='EXPORT')
         
         for index, line in enumerate(lines):
             row = layout.row()
@@ -666,6 +1575,14 @@ class DeleteLineOperator(bpy.types.Operator):
             line_colors.pop(self.index)
             line_vertex_refs.pop(self.index)
             line_dynamic_flags.pop(self.index)
+
+            mark_lines_changed(structure=True)
+
+            # Drop the clearance bound to this line and shift the ones after it
+            clearance_measurements[:] = [r for r in clearance_measurements if r["line"] != self.index]
+            for record in clearance_measurements:
+                if record["line"] > self.index:
+                    record["line"] -= 1
             context.area.tag_redraw()
         else:
             self.report({'WARNING'}, "Index out of bounds or list is empty")
@@ -682,11 +1599,167 @@ class ToggleLinesVisibilityOperator(bpy.types.Operator):
         lines_visible = not lines_visible  
         if not lines_visible and drawing_active:
             drawing_active = False
-            if font_info["handler"]:
-                bpy.types.SpaceView3D.draw_handler_remove(font_info["handler"], 'WINDOW')
-                font_info["handler"] = None
+
+        # Updates are skipped while hidden, so catch up on everything that moved meanwhile
+        if lines_visible:
+            update_clearances()
+            update_lines(context.scene, context.evaluated_depsgraph_get())
         context.area.tag_redraw()
         return {'FINISHED'}
+
+
+class BakeMeasurementsOperator(bpy.types.Operator):
+    """Bake the length of every vertex-bound line across a frame range"""
+    bl_idname = "view3d.bake_measurements"
+    bl_label = "Bake Measurements"
+    bl_options = {'REGISTER'}
+
+    use_scene_range: bpy.props.BoolProperty(name="Use Scene Range", default=True)
+    frame_start: bpy.props.IntProperty(name="Start Frame", default=1)
+    frame_end: bpy.props.IntProperty(name="End Frame", default=250)
+    workers: bpy.props.IntProperty(
+        name="Worker Processes",
+        description="Split the frame range across background Blender processes (0 bakes in this session)",
+        default=0,
+        min=0,
+        max=64
+    )
+    write_fcurves: bpy.props.BoolProperty(name="Write F-Curves", default=True)
+
+    def invoke(self, context, event):
+        # Start a custom range from the scene range; keep the last custom range otherwise
+        if self.use_scene_range:
+            self.frame_start = context.scene.frame_start
+            self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "use_scene_range")
+        col = layout.column(align=True)
+        col.enabled = not self.use_scene_range
+        col.prop(self, "frame_start")
+        col.prop(self, "frame_end")
+        layout.prop(self, "workers")
+        if self.workers > 1 and not bpy.data.filepath:
+            layout.label(text="Save the file to bake with worker processes", icon='INFO')
+        layout.prop(self, "write_fcurves")
+
+    def execute(self, context):
+        scene = context.scene
+        frame_start, frame_end = (
+            (scene.frame_start, scene.frame_end) if self.use_scene_range else (self.frame_start, self.frame_end)
+        )
+        if frame_end < frame_start:
+            self.report({'WARNING'}, "End frame is before start frame")
+            return {'CANCELLED'}
+
+        if self.workers > 1 and (not bpy.data.filepath or bpy.data.is_dirty):
+            self.report({'WARNING'}, "Worker processes bake the saved file; save first to include recent changes")
+
+        try:
+            result = bake_measurements(scene, frame_start, frame_end, self.workers)
+        except RuntimeError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+
+        if result is None:
+            self.report({'WARNING'}, "No vertex-bound lines to bake")
+            return {'CANCELLED'}
+
+        if self.write_fcurves:
+            write_baked_fcurves(scene)
+
+        frames, count = result["lengths"].shape
+        self.report({'INFO'}, f"Baked {count} measurements over {frames} frames")
+        return {'FINISHED'}
+
+
+class ExportBakedMeasurementsOperator(bpy.types.Operator, ExportHelper):
+    """Export the baked measurement lengths as CSV"""
+    bl_idname = "view3d.export_baked_measurements"
+    bl_label = "Export Baked Measurements"
+
+    filename_ext = ".csv"
+    filter_glob: bpy.props.StringProperty(default="*.csv", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return baked_measurements["lengths"] is not None
+
+    def execute(self, context):
+        export_baked_measurements(self.filepath)
+        return {'FINISHED'}
+
+
+class ClearanceOperator(bpy.types.Operator):
+    """Measure the minimum clearance between two selected meshes or two vertex groups"""
+    bl_idname = "view3d.measure_clearance"
+    bl_label = "Measure Clearance"
+
+    group_a: bpy.props.StringProperty(
+        name="Vertex Group A",
+        description="Limit the active object to this vertex group (empty uses the whole mesh)"
+    )
+    group_b: bpy.props.StringProperty(
+        name="Vertex Group B",
+        description="Limit the other object to this vertex group (empty uses the whole mesh)"
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def clearance_objects(self, context):
+        """Two selected meshes (active first), or the single selected mesh twice."""
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        if len(meshes) == 2:
+            obj_a = context.active_object if context.active_object in meshes else meshes[0]
+            return obj_a, meshes[1] if obj_a == meshes[0] else meshes[0]
+        if len(meshes) == 1:
+            return meshes[0], meshes[0]
+        return None, None
+
+    def invoke(self, context, event):
+        # Ask for the vertex groups up front; the lines are not undoable, so there is no redo panel
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        obj_a, obj_b = self.clearance_objects(context)
+        if obj_a is None:
+            layout.label(text="Select two mesh objects, or one mesh and two vertex groups")
+            return
+        layout.prop_search(self, "group_a", obj_a, "vertex_groups", text=f"{obj_a.name} Group")
+        layout.prop_search(self, "group_b", obj_b, "vertex_groups", text=f"{obj_b.name} Group")
+
+    def execute(self, context):
+        # Two objects, or two vertex groups on a single object
+        obj_a, obj_b = self.clearance_objects(context)
+        if obj_a is None or (obj_a == obj_b and not (self.group_a and self.group_b)):
+            self.report({'WARNING'}, "Select two mesh objects, or one mesh and two vertex groups")
+            return {'CANCELLED'}
+
+        try:
+            source_a = {"obj": obj_a, "group": self.group_a, "indices": vertex_group_indices(obj_a, self.group_a)}
+            source_b = {"obj": obj_b, "group": self.group_b, "indices": vertex_group_indices(obj_b, self.group_b)}
+        except KeyError as error:
+            self.report({'WARNING'}, str(error))
+            return {'CANCELLED'}
+
+        dist = add_clearance_line(source_a, source_b)
+        if dist is None:
+            self.report({'WARNING'}, "No geometry to measure clearance between")
+            return {'CANCELLED'}
+
+        ensure_draw_handlers()
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+        self.report({'INFO'}, f"Clearance: {dist:.{context.scene.length_decimals}f}")
+        return {'FINISHED'}
+
+
 # Monitor for mesh changes to invalidate the BVH cache
 @bpy.app.handlers.persistent
 def depsgraph_update(scene, depsgraph):
@@ -694,8 +1767,16 @@ def depsgraph_update(scene, depsgraph):
     for update in depsgraph.updates:
         obj = update.id
         if isinstance(obj, bpy.types.Object) and obj.type == 'MESH':
-            mark_bvh_dirty(obj)
-    
+            mark_bvh_dirty(obj.original, update.is_updated_geometry)
+
+    # Frame changes made by the bake are evaluated by the bake itself, and hidden
+    # lines are brought up to date when they are shown again
+    if baking_active or not lines_visible:
+        return
+
+    # Re-solve clearance lines before update_lines redraws the viewport
+    update_clearances(depsgraph)
+
     # Call update_lines to handle dynamic line updates
     update_lines(scene, depsgraph)
 
@@ -703,8 +1784,12 @@ def depsgraph_update(scene, depsgraph):
 
 # Register the depsgraph update handler
 def register_depsgraph_handler():
-    if depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
-        bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+    handlers = bpy.app.handlers.depsgraph_update_post
+    # Drop handlers left behind by a previous load of this module before adding this one
+    for handler in list(handlers):
+        if getattr(handler, "__module__", None) == __name__ and handler.__name__ == depsgraph_update.__name__:
+            handlers.remove(handler)
+    handlers.append(depsgraph_update)
 
 
 def unregister_depsgraph_handler():
@@ -720,13 +1805,25 @@ classes = [
      VIEW3D_PT_draw_line_panel,
      ToggleLinesVisibilityOperator,
      DeleteLineOperator,
+     BakeMeasurementsOperator,
+     ExportBakedMeasurementsOperator,
+     ClearanceOperator,
 ]
 
 
 def register():
+    global addon_registered
+    if addon_registered:
+        return
+    started = time.perf_counter()
+
     for cls in classes:
         bpy.utils.register_class(cls)
-    register_depsgraph_handler()
+
+    # Nothing is drawn in background mode, so there are no lines to keep up to date
+    if not bpy.app.background:
+        register_depsgraph_handler()
+
     bpy.types.Scene.font_size = bpy.props.FloatProperty(
         name="Font Size",
         description="Adjust the font size for line measurements",
@@ -742,31 +1839,43 @@ def register():
         max=10
     )
 
-    # Dynamically add color properties for each line
-    for i in range(len(lines)):
-        prop_name = f"line_color_{i}"
-        setattr(bpy.types.Scene, prop_name, bpy.props.FloatVectorProperty(
-            name=f"Line {i + 1} Color",
-            subtype='COLOR',
-            size=4,
-            default=(1.0, 1.0, 0.0, 1.0),  # Default to yellow
-            min=0.0,
-            max=1.0
-        ))
-        line_colors.append((1.0, 1.0, 0.0, 1.0))  # Default color for each line
+    # Line color properties are added by add_line_color as lines are drawn
+    addon_registered = True
+    load_timings["register"] = time.perf_counter() - started
+    if bpy.app.debug:
+        print(f"f-measure: import {load_timings['import'] * 1000:.1f} ms, "
+              f"register {load_timings['register'] * 1000:.1f} ms")
 
 def unregister():
+    global addon_registered
+    if not addon_registered:
+        return
+
     unregister_depsgraph_handler()
+    shutdown_line_updates()
+    remove_draw_handlers()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     del bpy.types.Scene.font_size
     del bpy.types.Scene.length_decimals
 
-    # Dynamically remove color properties for each line
-    for i in range(len(lines)):
-        prop_name = f"line_color_{i}"
-        if hasattr(bpy.types.Scene, prop_name):
-            delattr(bpy.types.Scene, prop_name)
+    # Remove the color properties created for each line
+    i = 0
+    while hasattr(bpy.types.Scene, f"line_color_{i}"):
+        delattr(bpy.types.Scene, f"line_color_{i}")
+        i += 1
+
+    gpu_resources.clear()
+    projection_cache.clear()
+    bvh_cache.clear()
+    local_bvh_cache.clear()
+    addon_registered = False
+
+load_timings["import"] = time.perf_counter() - import_started
 
 if __name__ == "__main__":
-    register()
+    # Background bake workers run this file with the worker flag after "--"
+    if BAKE_WORKER_FLAG in sys.argv:
+        run_bake_worker(sys.argv[sys.argv.index(BAKE_WORKER_FLAG) + 1:])
+    else:
+        register()